@@ -0,0 +1,184 @@
+import functools
+import os
+from types import MappingProxyType
+
+from gurobipy import GRB
+
+# ----------------------------
+# Shared helpers for the stage models
+# ----------------------------
+
+
+@functools.lru_cache(maxsize=None)
+def build_indices(frozen_routes):
+    """Index structures shared by the stage models, cached per instance.
+
+    frozen_routes is ((job_id, ((machine, p), ...)), ...); index_routes
+    builds it from a routes dict. Returns (ops, ops_by_machine, m_of, p_of,
+    UB) where ops lists (job_id, op_index) in route order and UB is the
+    total processing time. The results are shared between calls and are
+    returned as read-only views.
+    """
+    ops, ops_by_machine, m_of, p_of = [], {}, {}, {}
+    for i, route in frozen_routes:
+        for t, (m, p) in enumerate(route):
+            ops.append((i, t))
+            ops_by_machine.setdefault(m, []).append((i, t))
+            m_of[i, t] = m
+            p_of[i, t] = p
+    UB = sum(p_of.values())
+    ops_by_machine = MappingProxyType({m: tuple(v) for m, v in ops_by_machine.items()})
+    return tuple(ops), ops_by_machine, MappingProxyType(m_of), MappingProxyType(p_of), UB
+
+
+def index_routes(routes):
+    """build_indices for a routes dict job_id -> [(machine, p), ...]."""
+    return build_indices(tuple((i, tuple(r)) for i, r in routes.items()))
+
+
+def configure(model):
+    """Apply the Gurobi parameters shared by all stage models."""
+    model.Params.Threads = 0        # Let Gurobi pick the thread count
+    model.Params.Method = 2         # Barrier for the root LP
+    model.Params.MIPFocus = 1       # Favour finding good feasible schedules
+    model.Params.Presolve = 2       # Aggressive presolve for small dense MIPs
+    model.Params.Symmetry = 2       # Aggressive symmetry detection
+    model.Params.Heuristics = 0.2   # More time in primal heuristics
+
+
+def configure_root_lp(model):
+    """Trade LP accuracy for speed: barrier without crossover, looser tolerances.
+
+    Call after configure(), which already selects barrier for the root.
+    FeasibilityTol and OptimalityTol apply to every LP in the branch and
+    bound, not only the root, so solution values can be off by about 1e-5
+    and should be rounded to the data's precision before printing.
+    """
+    model.Params.Crossover = 0
+    model.Params.BarConvTol = 1e-5
+    model.Params.FeasibilityTol = 1e-5
+    model.Params.OptimalityTol = 1e-5
+    model.Params.BarHomogeneous = 1
+
+
+def apply_tuned_params(model, name, tune_time=60):
+    """Load tuned parameters for model, running the tuner once if none are cached.
+
+    The cache file is <name>_<vars>v_<constrs>c.prm, so a change in the
+    instance or formulation gets its own tuning run instead of reusing a
+    stale file. Tuning is capped at tune_time seconds. LogFile and
+    LogToConsole keep the values they had before the call.
+    """
+    model.update()
+    prm_file = f"{name}_{model.NumVars}v_{model.NumConstrs}c.prm"
+    # Loading a parameter set resets the log redirect the caller chose
+    log_file, log_to_console = model.Params.LogFile, model.Params.LogToConsole
+    if os.path.exists(prm_file):
+        print(f"Using tuned parameters from {prm_file}")
+        model.read(prm_file)
+    else:
+        model.Params.TuneTimeLimit = tune_time
+        model.tune()
+        if model.TuneResultCount > 0:
+            model.getTuneResult(0)      # Loads the best parameter set into model
+            model.write(prm_file)
+    # Only reassign what changed, since every assignment is echoed to the console
+    if model.Params.LogFile != log_file:
+        model.Params.LogFile = log_file
+    if model.Params.LogToConsole != log_to_console:
+        model.Params.LogToConsole = log_to_console
+
+
+def add_relaxation_start(model, repair=None):
+    """Add a MIP start built by rounding the LP relaxation of model.
+
+    The start is appended after any existing ones, so Gurobi keeps the
+    best of them. repair, if given, is called with {var: value} and may
+    overwrite the rounded values in place before they are handed over.
+    """
+    relax = model.relax()
+    relax.optimize()
+    if relax.Status != GRB.OPTIMAL:
+        return
+
+    mip_vars = model.getVars()
+    values = {}
+    for v, rv in zip(mip_vars, relax.getVars()):
+        values[v] = round(rv.X) if v.VType == GRB.BINARY else rv.X
+    if repair is not None:
+        repair(values)
+
+    model.update()
+    start_number = model.NumStart
+    model.NumStart = start_number + 1
+    model.update()
+    model.Params.StartNumber = start_number
+    model.setAttr("Start", mip_vars, [values[v] for v in mip_vars])
+    model.Params.StartNumber = 0
+    model.update()
+
+
+def greedy_schedule(jobs):
+    """Dispatch operations greedily: earliest possible start, ties by SPT.
+
+    jobs maps job_id -> [(machine, processing_time), ...] in route order.
+    Returns {(job_id, op_index): start_time} for every operation.
+    """
+    next_op = {i: 0 for i in jobs}
+    job_ready = {i: 0 for i in jobs}
+    machine_ready = {}
+    start = {}
+    while any(next_op[i] < len(jobs[i]) for i in jobs):
+        best = None
+        for i in jobs:
+            k = next_op[i]
+            if k == len(jobs[i]):
+                continue
+            m, p = jobs[i][k]
+            s = max(job_ready[i], machine_ready.get(m, 0))
+            if best is None or (s, p) < best[0]:
+                best = ((s, p), i)
+        (s, p), i = best
+        k = next_op[i]
+        m = jobs[i][k][0]
+        start[i, k] = s
+        job_ready[i] = machine_ready[m] = s + p
+        next_op[i] += 1
+    return start
+
+
+def solve_cpsat(jobs, workers=8):
+    """Solve the job-shop makespan problem for jobs with OR-Tools CP-SAT.
+
+    Processing times must be integers. Returns (optimal, makespan,
+    {(i, k): start}), where optimal is False if the schedule was found but
+    not proven optimal, or None if CP-SAT found no schedule.
+    """
+    from ortools.sat.python import cp_model
+
+    horizon = index_routes(jobs)[-1]
+    model = cp_model.CpModel()
+    starts, ends, intervals_by_machine = {}, {}, {}
+    for i, ops in jobs.items():
+        for k, (m, p) in enumerate(ops):
+            starts[i, k] = model.NewIntVar(0, horizon, f"s_{i}_{k}")
+            ends[i, k] = model.NewIntVar(0, horizon, f"e_{i}_{k}")
+            interval = model.NewIntervalVar(starts[i, k], p, ends[i, k], f"iv_{i}_{k}")
+            intervals_by_machine.setdefault(m, []).append(interval)
+            if k > 0:
+                model.Add(starts[i, k] >= ends[i, k - 1])
+
+    for intervals in intervals_by_machine.values():
+        model.AddNoOverlap(intervals)
+
+    makespan = model.NewIntVar(0, horizon, "Cmax")
+    model.AddMaxEquality(makespan, [ends[i, len(ops) - 1] for i, ops in jobs.items()])
+    model.Minimize(makespan)
+
+    solver = cp_model.CpSolver()
+    solver.parameters.num_workers = workers
+    status = solver.Solve(model)
+    if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+        return None
+    optimal = status == cp_model.OPTIMAL
+    return optimal, solver.Value(makespan), {op: solver.Value(s) for op, s in starts.items()}
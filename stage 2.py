@@ -1,6 +1,14 @@
+# Stage 2: the stage_1 disjunctive (Big-M) job-shop model with a third job.
+# This no longer implements the stagewise formulation described in
+# stage2info.pdf; stage 3.py and stage 4.py carry the stage-slot model.
+
+from itertools import combinations
+
 import gurobipy as gp
 from gurobipy import GRB
 
+from jobshop_core import apply_tuned_params, configure, greedy_schedule, index_routes
+
 # Jobs data: each job has a sequence of (machine, processing time)
 jobs = {
     1: [(1, 3), (2, 2)],
@@ -8,61 +16,35 @@ jobs = {
     3: [(1, 2), (2, 1)],
 }
 
-machines = {1, 2}
+# Operations, operations per machine and total processing time
+op_index, ops_by_machine, _, _, bigM = index_routes(jobs)
 
-# Total number of stages (simplified upper bound)
-num_stages = 10
-
-model = gp.Model("StagewiseJobShop")
-
-# Binary decision: x[job, operation, stage] = 1 if operation starts at stage
-x = {}
-for j in jobs:
-    for k in range(len(jobs[j])):
-        for t in range(num_stages):
-            x[j, k, t] = model.addVar(vtype=GRB.BINARY, name=f"x_{j}_{k}_{t}")
+model = gp.Model("JobShop3")
+model.Params.LogFile = "stage_2.log"   # Keep the solver log out of stdout
+model.Params.LogToConsole = 0
 
 # Start time variables for each operation
-S = {}
-for j in jobs:
-    for k in range(len(jobs[j])):
-        S[j, k] = model.addVar(lb=0, vtype=GRB.CONTINUOUS, name=f"S_{j}_{k}")
+S = model.addVars(op_index, lb=0, vtype=GRB.CONTINUOUS, name="S")
+
+# Ordering binaries: y[j,k,i,l] = 1 if (j,k) runs before (i,l) on their machine
+pair_index = [(j, k, i, l) for m in ops_by_machine
+              for (j, k), (i, l) in combinations(ops_by_machine[m], 2)]
+y = model.addVars(pair_index, vtype=GRB.BINARY, name="y")
 
 # Completion time variable
 Cmax = model.addVar(lb=0, name="Cmax")
 
-# Ensure each operation is assigned exactly one stage
-for j in jobs:
-    for k in range(len(jobs[j])):
-        model.addConstr(gp.quicksum(x[j, k, t] for t in range(num_stages)) == 1, name=f"assign_{j}_{k}")
-
-# Enforce sequential operations for each job across stages
+# Enforce sequential operations for each job
 for j in jobs:
     for k in range(len(jobs[j]) - 1):
-        for t in range(num_stages):
-            # operation k+1 can't start before k completes
-            model.addConstr(
-                gp.quicksum(t_prime * x[j, k + 1, t_prime] for t_prime in range(num_stages)) >=
-                gp.quicksum((t + 1) * x[j, k, t] for t in range(num_stages)),
-                name=f"seq_{j}_{k}"
-            )
-
-# Machine capacity: no two operations on the same machine overlap at same stage
-for m in machines:
-    for t in range(num_stages):
-        model.addConstr(
-            gp.quicksum(x[j, k, t] for j in jobs for k, (machine, _) in enumerate(jobs[j]) if machine == m) <= 1,
-            name=f"mach_{m}_{t}"
-        )
-
-# Calculate start times based on assigned stages and processing times
-bigM = 10000  # Large constant
-for j in jobs:
-    for k, (m, p) in enumerate(jobs[j]):
-        model.addConstr(
-            S[j, k] == gp.quicksum(t * p * x[j, k, t] for t in range(num_stages)),
-            name=f"starttime_{j}_{k}"
-        )
+        # operation k+1 can't start before k completes
+        model.addConstr(S[j, k + 1] >= S[j, k] + jobs[j][k][1])
+
+# Machine capacity: no two operations on the same machine overlap
+# (bigM is the total processing time)
+for (j, k, i, l) in pair_index:
+    model.addConstr(S[i, l] >= S[j, k] + jobs[j][k][1] - bigM * (1 - y[j, k, i, l]))
+    model.addConstr(S[j, k] >= S[i, l] + jobs[i][l][1] - bigM * y[j, k, i, l])
 
 # Makespan is max completion time over all jobs and operations
 for j in jobs:
@@ -76,12 +58,32 @@ for j in jobs:
 # Objective: minimize makespan
 model.setObjective(Cmax, GRB.MINIMIZE)
 
+# Warm start from a greedy dispatch schedule
+start = greedy_schedule(jobs)
+for (j, k), var in S.items():
+    var.Start = start[j, k]
+for (j, k, i, l), var in y.items():
+    var.Start = 1 if start[j, k] < start[i, l] else 0
+Cmax.Start = max(start[j, len(jobs[j]) - 1] + jobs[j][-1][1] for j in jobs)
+model.update()
+
+configure(model)
+apply_tuned_params(model, "stage_2")
+# Collect alternative schedules within 5% of the optimum in the same solve
+model.Params.PoolSearchMode = 2
+model.Params.PoolSolutions = 50
+model.Params.PoolGap = 0.05
 model.optimize()
 
 # Output results
 for j in jobs:
     for k in range(len(jobs[j])):
-        for t in range(num_stages):
-            if x[j, k, t].X > 0.5:
-                print(f"Job {j} Operation {k} starts at stage {t}, time {t * jobs[j][k][1]}")
+        print(f"Job {j} Operation {k} starts at time {S[j, k].X}")
 print(f"Optimized makespan: {Cmax.X}")
+print(f"Solve time: {model.Runtime:.3f} s")
+
+print(f"\nSchedules in the solution pool: {model.SolCount}")
+for n in range(model.SolCount):
+    model.Params.SolutionNumber = n
+    starts = model.getAttr("Xn", S)
+    print(f"Makespan {Cmax.Xn}: " + ", ".join(f"Job {j} Op {k} at {starts[j, k]}" for (j, k) in S))
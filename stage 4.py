@@ -1,6 +1,9 @@
 import gurobipy as gp
 from gurobipy import GRB
 
+from jobshop_core import (add_relaxation_start, apply_tuned_params, configure,
+                          configure_root_lp, greedy_schedule, index_routes)
+
 # -----------------------------
 # Input: jobs, machines, ordered routes
 # -----------------------------
@@ -14,20 +17,29 @@ routes = {
     7: [(5,0.269), (4,0.185), (6,0.06), (2,0.065), (1,0.029), (7,0.029), (3,0.017)],
     8: [(3,0.074), (5,0.074), (2,0.034), (1,0.034), (4,0.29), (6,0.02)]
 }
+
+# Work in integer thousandths of a time unit: keeps LP coefficients on one
+# scale and Big-M style values exactly representable
+SCALE = 1000
+routes = {i: [(m, int(round(p*SCALE))) for (m, p) in ops] for i, ops in routes.items()}
 jobs = list(routes.keys())
-machines = sorted({m for ops in routes.values() for (m, _) in ops})
-K = sum(len(ops) for ops in routes.values())
+
+# ops: (job, operation) pairs; m_of/p_of: machine and processing time of each
+ops, ops_by_machine, m_of, p_of, _ = index_routes(routes)
+machines = sorted(ops_by_machine)
+K = len(ops)
 
 # -----------------------------
 # Model
 # -----------------------------
 model = gp.Model("para_mdp")
+model.Params.LogFile = "stage_4.log"   # Keep the solver log out of stdout
+model.Params.LogToConsole = 0
 
 # Theta[k,m]: machine availability
 Theta = model.addVars(range(K+1), machines, lb=0, name="Theta")
 
 # eta[k,i,t]: binary, 1 if job i's operation t scheduled at stage k
-ops = [(i,t) for i in jobs for t in range(len(routes[i]))]
 eta = model.addVars(range(K), ops, vtype=GRB.BINARY, name="eta")
 
 # Makespan
@@ -37,44 +49,97 @@ Cmax = model.addVar(lb=0, name="Cmax")
 # Constraints
 # -----------------------------
 
+# Processing-time coefficients of each machine's operations, aligned with ops_by_machine
+coefs_by_machine = {m: [p_of[i,t] for (i,t) in ops_by_machine[m]] for m in machines}
+
 # (1) One operation scheduled per stage
-for k in range(K):
-    model.addConstr(gp.quicksum(eta[k,i,t] for (i,t) in ops) == 1)
+model.addConstrs((eta.sum(k,'*','*') == 1 for k in range(K)), name="stage")
 
 # (2) Each operation executed exactly once
-for (i,t) in ops:
-    model.addConstr(gp.quicksum(eta[k,i,t] for k in range(K)) == 1)
+model.addConstrs((eta.sum('*',i,t) == 1 for (i,t) in ops), name="assign")
 
 # (3) Theta recursion: machine availability
-for k in range(K):
-    for m in machines:
-        model.addConstr(
-            Theta[k+1,m] >= Theta[k,m] +
-            gp.quicksum(routes[i][t][1]*eta[k,i,t] for (i,t) in ops if routes[i][t][0]==m)
-        )
+model.addConstrs(
+    (Theta[k+1,m] >= Theta[k,m] +
+     gp.LinExpr(coefs_by_machine[m], [eta[k,i,t] for (i,t) in ops_by_machine[m]])
+     for k in range(K) for m in machines)
+)
 
 # (4) Makespan
-for (i,t) in ops:
-    m = routes[i][t][0]
-    model.addConstr(Cmax >= Theta[K,m])
+model.addConstrs((Cmax >= Theta[K,m] for m in machines), name="makespan")
 
 # (5) Precedence constraints: operation t cannot start before t-1 is done
-for i in jobs:
-    for t in range(1, len(routes[i])):  # start from second operation
-        for k2 in range(K):
-            model.addConstr(
-                gp.quicksum(eta[k1, i, t-1] for k1 in range(k2+1)) 
-                >= eta[k2, i, t]
-            )
+prec = model.addConstrs(
+    (gp.quicksum(eta[k1,i,t-1] for k1 in range(k2+1)) >= eta[k2,i,t]
+     for i in jobs
+     for t in range(1, len(routes[i]))  # start from second operation
+     for k2 in range(K))
+)
+# Each row only matters near the stages where job i's operations sit, so
+# most are slack: keep them out of the LP until Gurobi finds them violated
+model.setAttr("Lazy", list(prec.values()), [3]*len(prec))
 
 # -----------------------------
 # Objective
 # -----------------------------
 model.setObjective(Cmax, GRB.MINIMIZE)
 
+# -----------------------------
+# Warm start
+# -----------------------------
+model.update()   # Vars can only key the start values once they are in the model
+
+
+def start_values(order):
+    """Values of eta, Theta and Cmax when the ops run in the given stage order."""
+    values = {}
+    for (k,i,t), var in eta.items():
+        values[var] = 1 if order[k] == (i,t) else 0
+    load = {m: 0 for m in machines}
+    for k in range(K+1):
+        for m in machines:
+            values[Theta[k,m]] = load[m]
+        if k < K:
+            load[m_of[order[k]]] += p_of[order[k]]
+    values[Cmax] = max(load.values())
+    return values
+
+
+# Stage the operations in the order a greedy dispatch schedule starts them;
+# an operation always starts after its predecessor, so routes stay in order
+start = greedy_schedule(routes)
+for var, value in start_values(sorted(ops, key=lambda op: (start[op], op))).items():
+    var.Start = value
+model.update()
+
+
+# Second start: round the LP relaxation, then repair it into a stage order
+def repair_start(values):
+    # Stage where the rounded LP put each operation (K if nowhere)
+    placed = {}
+    for (k,i,t), var in eta.items():
+        if values[var] > 0.5 and (i,t) not in placed:
+            placed[i,t] = k
+    # Repeatedly take the job whose next operation was placed earliest, so
+    # every stage holds one operation and routes stay in order
+    pending = {i: [(i,t) for t in range(len(routes[i]))] for i in jobs}
+    order = []
+    while pending:
+        i = min(pending, key=lambda j: (placed.get(pending[j][0], K), j))
+        order.append(pending[i].pop(0))
+        if not pending[i]:
+            del pending[i]
+    values.update(start_values(order))
+
+
+add_relaxation_start(model, repair_start)
+
 # -----------------------------
 # Solve
 # -----------------------------
+configure(model)
+configure_root_lp(model)
+apply_tuned_params(model, "stage_4")
 model.optimize()
 
 # -----------------------------
@@ -82,24 +147,24 @@ model.optimize()
 # -----------------------------
 if model.status == GRB.OPTIMAL:
     print("\nOptimal solution found:")
-    print(f"Makespan (Cmax) = {model.objVal}")
+    print(f"Makespan (Cmax) = {round(model.objVal) / SCALE}")
+    print(f"Solve time = {model.Runtime:.3f} s")
     print("\nSchedule:")
 
-    # Iterate through each stage and identify the scheduled operation
-    for k in range(K):
-        for (i, t) in ops:
-            if eta[k, i, t].X > 0.5:
-                job_id = i
-                op_index = t
-                machine_id = routes[job_id][op_index][0]
-                processing_time = routes[job_id][op_index][1]
-                print(f"Stage {k+1}: Job {job_id}'s operation {op_index+1} on Machine {machine_id} for {processing_time} units")
+    # Fetch all solution values in one call, then pick the scheduled operations
+    eta_x = model.getAttr("X", eta)
+    sched = sorted((k, i, t) for (k, i, t), v in eta_x.items() if v > 0.5)
+    for (k, job_id, op_index) in sched:
+        machine_id = m_of[job_id, op_index]
+        processing_time = p_of[job_id, op_index] / SCALE
+        print(f"Stage {k+1}: Job {job_id}'s operation {op_index+1} on Machine {machine_id} for {processing_time} units")
 
     print("\nMachine busy times (Theta):")
+    theta_x = model.getAttr("X", Theta)
     for k in range(K + 1):
         for m in machines:
-            if Theta[k, m].X > 0:
-                print(f"Theta[{k}, {m}] = {Theta[k, m].X}")
+            if round(theta_x[k, m]) > 0:
+                print(f"Theta[{k}, {m}] = {round(theta_x[k, m]) / SCALE}")
 else:
     print("\nNo optimal solution found.")
     print(f"Status code: {model.status}")
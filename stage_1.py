@@ -1,6 +1,11 @@
+from itertools import combinations
+
 import gurobipy as gp
 from gurobipy import GRB
 
+from jobshop_core import (add_relaxation_start, apply_tuned_params, configure,
+                          greedy_schedule, index_routes)
+
 # ----------------------------
 # Problem Data
 # ----------------------------
@@ -10,22 +15,27 @@ jobs = {
     2: [(2, 2), (1, 1)]    # Job 2: M2-2, then M1-1
 }
 
-machines = [1, 2]          # List of machines
-bigM = 1000                # Big-M value (upper bound on time)
+# Operations, operations per machine and total processing time.
+# Big-M value: running every operation back to back takes the total processing
+# time, so some optimal (semi-active) schedule finishes within it
+op_index, ops_by_machine, _, _, bigM = index_routes(jobs)
+machines = sorted(ops_by_machine)   # Machines that have operations
 
 # ----------------------------
 # Model
 # ----------------------------
 model = gp.Model("JobShop")
+model.Params.LogFile = "stage_1.log"   # Keep the solver log out of stdout
+model.Params.LogToConsole = 0
 
 # Decision variables
-S = {}     # Start times
-C = {}     # Completion times
+S = model.addVars(op_index, lb=0, name="S")     # Start times
+C = model.addVars(op_index, lb=0, name="C")     # Completion times
 
-for i in jobs:
-    for k, (m, p) in enumerate(jobs[i]):
-        S[i, k] = model.addVar(lb=0, name=f"S_{i}_{k}")
-        C[i, k] = model.addVar(lb=0, name=f"C_{i}_{k}")
+# Ordering binaries: x[i,k,j,l] = 1 if (j,l) runs before (i,k)
+pair_index = [(i, k, j, l) for m in machines
+              for (i, k), (j, l) in combinations(ops_by_machine[m], 2)]
+x = model.addVars(pair_index, vtype=GRB.BINARY, name="x")
 
 # Makespan
 Cmax = model.addVar(lb=0, name="Cmax")
@@ -44,18 +54,10 @@ for i in jobs:
         model.addConstr(S[i, k+1] >= C[i, k])
 
 # 3. Machine non-overlap (disjunctive constraints with binaries)
-for m in machines:
-    # Get all operations on this machine
-    ops = [(i, k) for i in jobs for k, (mm, _) in enumerate(jobs[i]) if mm == m]
-    # Pairwise ordering
-    for a in range(len(ops)):
-        for b in range(a+1, len(ops)):
-            i, k = ops[a]
-            j, l = ops[b]
-            x = model.addVar(vtype=GRB.BINARY, name=f"x_{i}_{k}_{j}_{l}")
-            # Either (i,k) before (j,l) OR (j,l) before (i,k)
-            model.addConstr(S[i, k] >= C[j, l] - bigM * (1 - x))
-            model.addConstr(S[j, l] >= C[i, k] - bigM * x)
+for (i, k, j, l) in pair_index:
+    # Either (i,k) before (j,l) OR (j,l) before (i,k)
+    model.addConstr(S[i, k] >= C[j, l] - bigM * (1 - x[i, k, j, l]))
+    model.addConstr(S[j, l] >= C[i, k] - bigM * x[i, k, j, l])
 
 # 4. Makespan definition
 for i in jobs:
@@ -67,9 +69,59 @@ for i in jobs:
 # ----------------------------
 model.setObjective(Cmax, GRB.MINIMIZE)
 
+# ----------------------------
+# Warm start from a greedy dispatch schedule
+# ----------------------------
+start = greedy_schedule(jobs)
+for i in jobs:
+    for k, (m, p) in enumerate(jobs[i]):
+        S[i, k].Start = start[i, k]
+        C[i, k].Start = start[i, k] + p
+for (i, k, j, l), var in x.items():
+    var.Start = 1 if start[j, l] < start[i, k] else 0
+Cmax.Start = max(start[i, len(jobs[i]) - 1] + jobs[i][-1][1] for i in jobs)
+model.update()
+
+
+# Second start: round the LP relaxation, then rebuild the times from the
+# machine order it implies
+def repair_start(values):
+    preds = {op: [] for op in op_index}
+    for i in jobs:
+        for k in range(1, len(jobs[i])):
+            preds[i, k].append((i, k - 1))
+    for (i, k, j, l), var in x.items():
+        if values[var] > 0.5:
+            preds[i, k].append((j, l))     # (j,l) runs before (i,k)
+        else:
+            preds[j, l].append((i, k))
+    # Earliest starts by longest path; leave the start alone if the order has a cycle
+    t0 = {op: 0 for op in op_index}
+    for _ in range(len(op_index)):
+        changed = False
+        for (i, k), before in preds.items():
+            for (j, l) in before:
+                if t0[j, l] + jobs[j][l][1] > t0[i, k]:
+                    t0[i, k] = t0[j, l] + jobs[j][l][1]
+                    changed = True
+        if not changed:
+            break
+    else:
+        return
+    for (i, k), t in t0.items():
+        values[S[i, k]] = t
+        values[C[i, k]] = t + jobs[i][k][1]
+    values[Cmax] = max(t0[i, len(jobs[i]) - 1] + jobs[i][-1][1] for i in jobs)
+
+
+add_relaxation_start(model, repair_start)
+
 # ----------------------------
 # Solve
 # ----------------------------
+configure(model)
+model.Params.Cuts = 2      # Aggressive cuts for the pure disjunctive model
+apply_tuned_params(model, "stage_1")
 model.optimize()
 
 # ----------------------------
@@ -81,3 +133,4 @@ for i in jobs:
         print(f"Job {i} Operation {k}: Start = {S[i, k].X}, End = {C[i, k].X}")
 
 print(f"\nOptimal Makespan = {Cmax.X}")
+print(f"Solve time = {model.Runtime:.3f} s")
@@ -0,0 +1,30 @@
+from jobshop_core import solve_cpsat
+
+# ----------------------------
+# Problem Data
+# ----------------------------
+# Same instance as stage_1.py, solved with CP-SAT's no-overlap propagation
+jobs = {
+    1: [(1, 3), (2, 2)],   # Job 1: M1-3, then M2-2
+    2: [(2, 2), (1, 1)]    # Job 2: M2-2, then M1-1
+}
+
+# ----------------------------
+# Solve
+# ----------------------------
+result = solve_cpsat(jobs)
+
+# ----------------------------
+# Print Results
+# ----------------------------
+if result is None:
+    print("\nNo schedule found.")
+else:
+    optimal, Cmax, start = result
+    label = "Optimal" if optimal else "Best found (not proven optimal)"
+    print(f"\n{label} Schedule:")
+    for i in jobs:
+        for k, (m, p) in enumerate(jobs[i]):
+            print(f"Job {i} Operation {k}: Start = {start[i, k]}, End = {start[i, k] + p}")
+
+    print(f"\n{label} Makespan = {Cmax}")
@@ -0,0 +1,43 @@
+from jobshop_core import solve_cpsat
+
+# Job-shop makespan for the stage 4 routes, solved with CP-SAT. This is not
+# a CP-SAT backend for stage 4.py: that model bounds Cmax only by the load
+# on each machine, while this one schedules start times along every route,
+# so its makespan is larger (3.192 vs 2.657 for these routes).
+
+# -----------------------------
+# Input: jobs, machines, ordered routes
+# -----------------------------
+routes = {
+   1: [(5,0.65), (3,0.514), (7,0.64), (2,0.202), (1,0.202), (4,0.24), (6,0.29)],
+    2: [(3,0.722), (2,0.338), (1,0.242), (8,0.242), (7,0.2), (4,0.2), (6,0.338), (5,0.578)],
+    3: [(2,0.089), (6,0.117), (1,0.185), (3,0.485), (5,0.185), (8,0.369), (4,0.117), (7,0.089)],
+    4: [(6,0.061), (2,0.061), (5,0.265), (3,0.025), (1,0.013), (4,0.025)],
+    5: [(5,0.392), (6,0.128), (2,0.05), (3,0.128), (1,0.072), (4,0.072)],
+    6: [(2,0.02), (5,0.244), (4,0.052), (3,0.052), (1,0.052), (6,0.01)],
+    7: [(5,0.269), (4,0.185), (6,0.06), (2,0.065), (1,0.029), (7,0.029), (3,0.017)],
+    8: [(3,0.074), (5,0.074), (2,0.034), (1,0.034), (4,0.29), (6,0.02)]
+}
+
+# CP-SAT needs integer durations: work in thousandths of a time unit
+SCALE = 1000
+int_routes = {i: [(m, int(round(p*SCALE))) for (m, p) in ops] for i, ops in routes.items()}
+
+# -----------------------------
+# Solve
+# -----------------------------
+result = solve_cpsat(int_routes)
+
+# -----------------------------
+# Display results
+# -----------------------------
+if result is None:
+    print("\nNo schedule found.")
+else:
+    optimal, Cmax, start = result
+    print("\nOptimal solution found:" if optimal else "\nFeasible solution found (not proven optimal):")
+    print(f"Makespan (Cmax) = {Cmax / SCALE}")
+    print("\nSchedule:")
+    for (i, t) in sorted(start, key=lambda op: (start[op], op)):
+        machine_id, processing_time = routes[i][t]
+        print(f"Job {i}'s operation {t+1} on Machine {machine_id} starts at {start[i, t] / SCALE} for {processing_time} units")